@@ -1,4 +1,5 @@
 import os
+import heapq
 import shutil
 import time
 import sys
@@ -6,10 +7,16 @@ import logging
 import cv2
 import numpy as np
 from logging.handlers import TimedRotatingFileHandler
-from ctypes import CDLL, c_char_p, c_bool, create_string_buffer, byref, c_float, c_ubyte
+from types import MappingProxyType
+import _ctypes
+from ctypes import CDLL, POINTER, c_char, c_char_p, c_bool, c_int, c_size_t, c_float, c_ubyte, c_uint16
 from threading import Lock
+try:
+    from fastrlock.rlock import FastRLock
+except ImportError:
+    from threading import RLock as FastRLock
 
-errcode_description = {
+errcode_description = MappingProxyType({
     '0000': 'Success',
     '0005': 'Powerboard Hardware error',
     '0006': 'Powerboard Hardware version mismatch',
@@ -39,23 +46,76 @@ errcode_description = {
     '8027': 'LED1 Current over upper-limit 100P Mode',
     '8028': 'LED2 Current over upper-limit 100P Mode',
     '9999': 'Communication exception',
+})
+
+_err_msgs = {k: f'errcode: {k}, errmsg: {v}' for k, v in errcode_description.items()}
+
+# DemuraDLL entry points: name -> (argtypes, restype)
+dll_prototypes = {
+    'EnableEmulator': ([c_bool], c_int),
+    'OpenDevice': ([c_char_p], c_int),
+    'CloseDevice': ([], c_int),
+    'PowerON': ([c_int], c_int),
+    'PowerOFF': ([], c_int),
+    'SetRGB': ([c_int, c_int, c_int], c_int),
+    'ShowEMMCImageIndex': ([c_int], c_int),
+    'ShowEMMCImageName': ([c_char_p], c_int),
+    'ReadVersion': ([c_char_p], c_int),
+    'ReadDLLVersion': ([c_char_p], c_int),
+    'GetEMMCImageName': ([c_char_p], c_int),
+    'SetDeviceIpAddress': ([c_int], c_int),
+    'WriteImageToEMMC': ([POINTER(c_char_p), c_int, c_bool, c_int, c_int, c_int, c_int, c_int], c_int),
+    'GetErrorCode': ([c_char_p], c_int),
+    'DemuraMode': ([c_int], c_int),
+    'LoadDemuraFile': ([c_char_p, POINTER(c_ubyte)], c_int),
+    'BeforeDemuraPowerOn': ([], c_int),
+    'DemuraWrite': ([], c_int),
+    'DemuraProtection': ([c_int], c_int),
+    'AfterDemuraPowerOn': ([], c_int),
+    'DemuraOTP': ([], c_int),
+    'DemuraRead': ([c_char_p], c_int),
 }
 
+# Entry points only present in newer DemuraDLL builds, bound to None when missing
+dll_optional_prototypes = {
+    'Decoding': ([c_int, c_char_p], c_int),
+    'LoadDemuraBuffer': ([POINTER(c_ubyte), c_size_t, c_uint16], c_int),
+    'DemuraFullSequence': ([c_char_p, c_uint16, c_int, POINTER(c_int)], c_int),
+    'ShowAllEMMCImages': ([c_int, c_int], c_int),
+}
+
+# demura write sequence, in the order DemuraFullSequence runs it natively
+demura_sequence_steps = ('LoadDemuraFile', 'DemuraMode', 'BeforeDemuraPowerOn', 'DemuraProtection(1)',
+                         'DemuraWrite', 'DemuraProtection(0)', 'AfterDemuraPowerOn')
+
 
 class DUTError(Exception):
+    __slots__ = ('value', 'err_code')
+
     def __init__(self, value, errcode=-1):
         Exception.__init__(self)
         self.value = value
         self.err_code = errcode
 
     def __str__(self):
-        return repr(f'{self.value} + errcode: {self.err_code}, '
-                    f'errmsg: {errcode_description.get(self.err_code, None)}')
+        err_msg = _err_msgs.get(self.err_code)
+        if err_msg is None:
+            err_msg = f'errcode: {self.err_code}, errmsg: None'
+        return repr(f'{self.value} + {err_msg}')
+
+
+def _free_library(handle):
+    if os.name == 'nt':
+        _ctypes.FreeLibrary(handle)
+    else:
+        _ctypes.dlclose(handle)
 
 
 class MyzyDDS(object):
-    retain_count = 1
-    lock = Lock()
+    # slot 1 loads DemuraDLL.dll itself, slot n > 1 loads the copy DemuraDLL_n.dll
+    _free_slots = []
+    _next_slot = 1
+    lock = FastRLock()
 
     def __init__(self, verbose=False):
         self.is_screen_poweron = False
@@ -64,37 +124,88 @@ class MyzyDDS(object):
         self._spliter = ','
         self._nvm_data_len = 28
         self._dll = None
+        self._slot = None
+        self._is_open = False
         self._host = None
         self._current_host = None
         self._emulator_mode = False
+        self._buf_lock = Lock()
+        self._buf128 = (c_char * 128)()
+        self._buf2k = (c_char * (2 * 1024))()
+        self._namelist_buf = (c_char * 384)()
+        self._c_files_cap = 0
+        self._c_files = None
+        self._c_files_refs = None
 
         fn_path = 'DemuraDLL.dll'
 
+        dll_path = fn_path
+        if not os.path.exists(fn_path):
+            dll_path = os.path.join(os.path.dirname(os.path.abspath(
+                sys.modules[MyzyDDS.__module__].__file__)), fn_path)
+        if verbose:
+            format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+            log_handel = TimedRotatingFileHandler('myzyDDS.log', when='D')
+            log_handel.setFormatter(logging.Formatter(format))
+            self._logger.addHandler(log_handel)
+            self._logger.setLevel(logging.DEBUG)
+
+        with MyzyDDS.lock:
+            if MyzyDDS._free_slots:
+                self._slot = heapq.heappop(MyzyDDS._free_slots)
+            else:
+                self._slot = MyzyDDS._next_slot
+                MyzyDDS._next_slot += 1
+            try:
+                if self._slot > 1:
+                    dll_cpy = f'_{self._slot}'.join(os.path.splitext(dll_path))
+                    if not (os.path.exists(dll_cpy)
+                            and os.path.getsize(dll_cpy) == os.path.getsize(dll_path)
+                            and os.path.getmtime(dll_cpy) >= os.path.getmtime(dll_path)):
+                        if os.path.exists(dll_cpy):
+                            os.remove(dll_cpy)
+                        shutil.copyfile(dll_path, dll_cpy)
+                    dll_path = dll_cpy
+                # CDLL (unlike PyDLL) releases the GIL around every foreign call, so long entries
+                # such as WriteImageToEMMC or DemuraWrite do not block other instances' threads.
+                self._dll = CDLL(dll_path)
+                for name, (argtypes, restype) in dll_prototypes.items():
+                    fn = getattr(self._dll, name)
+                    fn.argtypes = argtypes
+                    fn.restype = restype
+                    setattr(self, '_' + name, fn)
+                for name, (argtypes, restype) in dll_optional_prototypes.items():
+                    fn = getattr(self._dll, name, None)
+                    if fn is not None:
+                        fn.argtypes = argtypes
+                        fn.restype = restype
+                    setattr(self, '_' + name, fn)
+            except Exception:
+                # hand the slot back (and unload a half-bound DLL) so the next instance can use it
+                if self._dll is not None:
+                    _free_library(self._dll._handle)
+                    self._dll = None
+                heapq.heappush(MyzyDDS._free_slots, self._slot)
+                raise
+
+    def __del__(self):
+        dll = getattr(self, '_dll', None)
+        if dll is None:
+            return
         try:
-            dll_path = fn_path
-            if not os.path.exists(fn_path):
-                dll_path = os.path.join(os.path.dirname(os.path.abspath(
-                    sys.modules[MyzyDDS.__module__].__file__)), fn_path)
-            if verbose:
-                format = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-                log_handel = TimedRotatingFileHandler('myzyDDS.log', when='D')
-                log_handel.setFormatter(logging.Formatter(format))
-                self._logger.addHandler(log_handel)
-                self._logger.setLevel(logging.DEBUG)
-
-            MyzyDDS.lock.acquire()
-            if MyzyDDS.retain_count > 1:
-                dll_cpy = f'_{MyzyDDS.retain_count}'.join(os.path.splitext(dll_path))
-                if os.path.exists(dll_cpy):
-                    shutil.rmtree(dll_cpy, ignore_errors=True)
-                shutil.copyfile(dll_path, dll_cpy)
-                dll_path = dll_cpy
-            self._dll = CDLL(dll_path)
-            MyzyDDS.retain_count += 1
-
-            MyzyDDS.lock.release()
-        except Exception as e:
-            raise
+            # never unmap the DLL under a live connection
+            if self._is_open:
+                self._CloseDevice()
+                self._is_open = False
+            with MyzyDDS.lock:
+                for name in list(dll_prototypes) + list(dll_optional_prototypes):
+                    setattr(self, '_' + name, None)
+                self._dll = None
+                _free_library(dll._handle)
+                heapq.heappush(MyzyDDS._free_slots, self._slot)
+        except (AttributeError, TypeError, NameError):
+            # module globals are already torn down at interpreter shutdown, leave the DLL to the OS
+            pass
 
     def enable_emulator(self, emulator):
         self._emulator_mode = emulator
@@ -105,17 +216,20 @@ class MyzyDDS(object):
         * @Param [in] host: 192.168.21.address (address do not use 1 or 255)
         * @return Return to the status
         """
+        if host is None:
+            raise DUTError('Unable to connect DUT. No host given, call open_device with a host first.')
         self.is_screen_poweron = False
         self._host = host
 
-        self._dll.EnableEmulator(self._emulator_mode)
-        res = self._dll.OpenDevice(c_char_p(str(host).encode('utf-8')))
+        self._EnableEmulator(self._emulator_mode)
+        res = self._OpenDevice(host.encode('utf-8') if isinstance(host, str) else host)
         if res != 0:
             errcode = self.get_error_code()
             raise DUTError(f'Unable to connect DUT. Received: {res}', errcode=errcode)
         self._current_host = host
+        self._is_open = True
 
-        self._logger.debug('DUT Initialised ip %s. ' % host)
+        self._logger.debug('DUT Initialised ip %s. ', host)
         return True
 
     def power_on(self, ntype=0):
@@ -125,12 +239,12 @@ class MyzyDDS(object):
         * @return Return to the status
         """
         if not self.is_screen_poweron:
-            recv = self._dll.PowerON(ntype)  # type  0 = DSCMode_10P , 1 = DSCMode_100P
+            recv = self._PowerON(ntype)  # type  0 = DSCMode_10P , 1 = DSCMode_100P
             if recv != 0:
                 errcode = self.get_error_code()
                 raise DUTError("Exit power_on because power_on failed.", errcode=errcode)
             self.is_screen_poweron = True
-            self._logger.debug(f"screen on success.")
+            self._logger.debug("screen on success.")
             return True
 
     def power_off(self):
@@ -138,11 +252,11 @@ class MyzyDDS(object):
         * @brief screen off.
         * @return Return to the status
         """
-        recv = self._dll.PowerOFF()
+        recv = self._PowerOFF()
         if recv != 0:
             errcode = self.get_error_code()
             raise DUTError("Exit power_off because power_off failed.", errcode=errcode)
-        self._logger.debug(f"screen off success.")
+        self._logger.debug("screen off success.")
         self.is_screen_poweron = False
         return True
 
@@ -150,7 +264,8 @@ class MyzyDDS(object):
         """
         * @brief close device.
         """
-        self._dll.CloseDevice()
+        self._CloseDevice()
+        self._is_open = False
         self._logger.debug("Closing DUT.")
         self.is_screen_poweron = False
 
@@ -160,17 +275,38 @@ class MyzyDDS(object):
         * @Param [in] image: index or name
         * @return Return to the status
         """
-        if not isinstance(image, (int, str)):
-            raise NotImplementedError('Argument is error. Arg type should be int or str')
-        res = None
         if isinstance(image, int):
-            res = self._dll.ShowEMMCImageIndex(image)
-        elif isinstance(image, str):
-            res = self._dll.ShowEMMCImageName(c_char_p(image.encode('utf-8')))
+            return self.show_emmc_image_by_index(image)
+        if isinstance(image, str):
+            return self.show_emmc_image_by_name(image)
+        raise NotImplementedError('Argument is error. Arg type should be int or str')
+
+    def show_emmc_image_by_index(self, index):
+        """
+        * @brief show image.
+        * @Param [in] index: image index in EMMC
+        * @return Return to the status
+        """
+        res = self._ShowEMMCImageIndex(index)
         if res != 0:
             errcode = self.get_error_code()
-            raise DUTError(f'Fail to show image {image}.', errcode=errcode)
-        self._logger.debug(f"show image {image} success................")
+            raise DUTError(f'Fail to show image {index}.', errcode=errcode)
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug("show image %s success................", index)
+        return True
+
+    def show_emmc_image_by_name(self, name):
+        """
+        * @brief show image.
+        * @Param [in] name: image name in EMMC
+        * @return Return to the status
+        """
+        res = self._ShowEMMCImageName(name.encode('utf-8'))
+        if res != 0:
+            errcode = self.get_error_code()
+            raise DUTError(f'Fail to show image {name}.', errcode=errcode)
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug("show image %s success................", name)
         return True
 
     def show_emmc_image(self, image):
@@ -181,18 +317,43 @@ class MyzyDDS(object):
         """
         return self._show_EMMC_image(image)
 
+    def show_all_emmc_images(self, frame_delay_ms=0, repeat=1):
+        """
+        * @brief show every EMMC image in order, in one DLL call.
+        * Fall back to showing the images one by one when the DLL has no ShowAllEMMCImages.
+        * @Param [in] frame_delay_ms; delay between images in milliseconds
+        * @Param [in] repeat; number of passes over the image list
+        * @return Return to the status
+        """
+        if self._ShowAllEMMCImages is None:
+            image_nums = len([name for name in self.get_emmc_image_name() if name])
+            frames = image_nums * repeat
+            for frame in range(frames):
+                self.show_emmc_image_by_index(frame % image_nums)
+                if frame_delay_ms and frame < frames - 1:
+                    time.sleep(frame_delay_ms / 1000)
+            return True
+        res = self._ShowAllEMMCImages(frame_delay_ms, repeat)
+        if res != 0:
+            errcode = self.get_error_code()
+            raise DUTError('Fail to show all images.', errcode=errcode)
+        self._logger.debug("show all images success................")
+        return True
+
     def read_version(self):
         """
         * @brief get the version of FW.
         * @return Return the FW version
         """
-        res_ver = create_string_buffer(128)
-        rec = self._dll.ReadVersion(byref(res_ver))
+        with self._buf_lock:
+            self._buf128[0] = b'\x00'
+            rec = self._ReadVersion(self._buf128)
+            res_ver = self._buf128.value
         if rec != 0:
             errcode = self.get_error_code()
             raise DUTError(f'Unable to get FW version. Received: {rec}', errcode=errcode)
-        res_ver = res_ver.value.decode('utf-8')
-        self._logger.debug(f"Read FW version: {res_ver}")
+        res_ver = res_ver.decode('utf-8')
+        self._logger.debug("Read FW version: %s", res_ver)
         return res_ver
 
     def read_dll_version(self):
@@ -200,14 +361,16 @@ class MyzyDDS(object):
         * @brief get the version of DLL.
         * @return Return the DLL version
         """
-        res_ver = create_string_buffer(128)
-        rec = self._dll.ReadDLLVersion(byref(res_ver))
+        with self._buf_lock:
+            self._buf128[0] = b'\x00'
+            rec = self._ReadDLLVersion(self._buf128)
+            res_ver = self._buf128.value
         if rec != 0:
             errcode = self.get_error_code()
             raise DUTError(f'Unable to get DLL version. Received: {rec}', errcode=errcode)
-        res_ver = res_ver.value.decode('utf-8')
+        res_ver = res_ver.decode('utf-8')
         res_ver = res_ver.split(':')[1].strip()
-        self._logger.debug(f"Read DLL version: {res_ver}")
+        self._logger.debug("Read DLL version: %s", res_ver)
         return res_ver
 
     def reset(self):
@@ -216,7 +379,8 @@ class MyzyDDS(object):
         * @return Return to the status
         """
         self.power_off()
-        self._dll.CloseDevice()
+        self._CloseDevice()
+        self._is_open = False
 
         self.open_device(self._current_host)
         return True
@@ -238,14 +402,17 @@ class MyzyDDS(object):
         if not isinstance(filenames, list):
             raise NotImplementedError(f'Arguments are not supported. filenames should be list')
         file_nums = len(filenames)
-        c_files = (c_char_p * file_nums)()
-        for file in range(file_nums):
-            c_files[file] = filenames[file].encode('utf-8')
-
-        res = self._dll.WriteImageToEMMC(c_files, file_nums, c_bool(isToRGB), iRotationType, nTailor, tailorWidth,
+        with self._buf_lock:
+            if self._c_files is None or file_nums > self._c_files_cap:
+                self._c_files_cap = max(file_nums, self._c_files_cap * 2)
+                self._c_files = (c_char_p * self._c_files_cap)()
+            self._c_files_refs = [f.encode('utf-8') for f in filenames]
+            self._c_files[:file_nums] = self._c_files_refs
+
+            res = self._WriteImageToEMMC(self._c_files, file_nums, isToRGB, iRotationType, nTailor, tailorWidth,
                                          tailorHeight, timeout)
         if res != 0:
-            self._logger.debug(f"write image Failed, return: {res}")
+            self._logger.debug("write image Failed, return: %s", res)
             errcode = self.get_error_code()
             raise DUTError(f'write image to EMMC Err. ', errcode=errcode)
 
@@ -258,16 +425,19 @@ class MyzyDDS(object):
         * @Param [out] namelist; Output name list.
         * @return Return to the status
         """
-        res = None
-        namelist_buffer = create_string_buffer(buffer)
-        res = self._dll.GetEMMCImageName(byref(namelist_buffer))
+        with self._buf_lock:
+            if buffer > len(self._namelist_buf):
+                self._namelist_buf = (c_char * buffer)()
+            self._namelist_buf[0] = b'\x00'
+            res = self._GetEMMCImageName(self._namelist_buf)
+            namelist = self._namelist_buf.value
         if res != 0:
             errcode = self.get_error_code()
             raise DUTError(f'get emmc image name err', errcode=errcode)
-        namelist = namelist_buffer.value.decode('utf-8')
+        namelist = namelist.decode('utf-8')
         namelist = namelist.split(',')
 
-        self._logger.debug(f"get emmc image name success................{namelist}")
+        self._logger.debug("get emmc image name success................%s", namelist)
         return namelist
 
     def set_device_ip_address(self, addr):
@@ -285,12 +455,12 @@ class MyzyDDS(object):
         *   CloseDevice();
         * @endcode
         """
-        rec = self._dll.SetDeviceIpAddress(addr)
+        rec = self._SetDeviceIpAddress(addr)
         if rec != 0:
             errcode = self.get_error_code()
             raise DUTError(f'Fail to set IP addr {addr}', errcode=errcode)
         self._current_host = f'192.168.21.{addr}'
-        self._logger.debug(f"set ip to {addr} success......")
+        self._logger.debug("set ip to %s success......", addr)
         return True
 
     def set_rgb(self, r, g, b):
@@ -302,30 +472,35 @@ class MyzyDDS(object):
         * @Param [in] Blue value
         * @return Return to the status
         """
-        res = self._dll.SetRGB(r, g, b)
+        res = self._SetRGB(r, g, b)
         if res != 0:
             errcode = self.get_error_code()
             raise DUTError('set rgb failed.', errcode=errcode)
 
-        self._logger.debug(f"set rgb success......")
+        self._logger.debug("set rgb success......")
         return True
 
     def _decode_msg(self, msg_code):
-        res_val = create_string_buffer(2*1024)
-        rec = self._dll.Decoding(msg_code, byref(res_val))
+        if self._Decoding is None:
+            raise NotImplementedError('Decoding is not exported by this DemuraDLL build')
+        with self._buf_lock:
+            self._buf2k[0] = b'\x00'
+            rec = self._Decoding(msg_code, self._buf2k)
+            res_val = self._buf2k.value
         if rec != 0:
             errcode = self.get_error_code()
             raise DUTError(f'Unable to _decode_msg', errcode=errcode)
-        return res_val.value.decode('utf-8')
+        return res_val.decode('utf-8')
 
     def get_error_code(self):
         """
         * @brief Return the last exception code for the device
         * @return Return to the Exception code , find the abnormal problem by looking up the table
         """
-        res_ver = create_string_buffer(128)
-        self._dll.GetErrorCode(byref(res_ver))
-        return res_ver.value
+        with self._buf_lock:
+            self._buf128[0] = b'\x00'
+            self._GetErrorCode(self._buf128)
+            return self._buf128.value.decode('utf-8')
 
     def demura_mode(self, mode):
         """
@@ -333,21 +508,39 @@ class MyzyDDS(object):
         * @Param [in] mode= 0,1,2.
         * @return Return to the status
         """
-        recv = self._dll.DemuraMode(mode)  # type  0, 1, 2
+        recv = self._DemuraMode(mode)  # type  0, 1, 2
         if recv != 0:
             errcode = self.get_error_code()
             raise DUTError("demura_mode  failed.", errcode=errcode)
-        self._logger.debug(f"demura_mode success. {mode}")
+        self._logger.debug("demura_mode success. %s", mode)
         return True
 
     def load_demura_file(self, filename, crc=0):
-        crc_ = (c_ubyte * 2)()
-        crc_.value = crc.to_bytes(2, 'big')
-        recv = self._dll.LoadDemuraFile(create_string_buffer(filename.encode('utf-8')), crc_)
+        crc_ = (c_ubyte * 2)(*crc.to_bytes(2, 'big'))
+        recv = self._LoadDemuraFile(filename.encode('utf-8'), crc_)
         if recv != 0:
             errcode = self.get_error_code()
             raise DUTError("load_demura_file  failed.", errcode=errcode)
-        self._logger.debug(f"load_demura_file success.")
+        self._logger.debug("load_demura_file success.")
+        return True
+
+    def load_demura_buffer(self, filename, crc=0):
+        """
+        * @brief load the demura data from a memory-mapped file instead of a path.
+        * Fall back to load_demura_file when the DLL has no LoadDemuraBuffer.
+        * @Param [in] filename; demura bin file
+        * @Param [in] crc; crc16 of the demura data
+        * @return Return to the status
+        """
+        if self._LoadDemuraBuffer is None:
+            return self.load_demura_file(filename, crc)
+        mm = np.memmap(filename, dtype=np.uint8, mode='r')
+        recv = self._LoadDemuraBuffer(mm.ctypes.data_as(POINTER(c_ubyte)), mm.size, crc)
+        del mm
+        if recv != 0:
+            errcode = self.get_error_code()
+            raise DUTError("load_demura_buffer  failed.", errcode=errcode)
+        self._logger.debug("load_demura_buffer success.")
         return True
 
     def before_demura_poweron(self):
@@ -356,11 +549,11 @@ class MyzyDDS(object):
         * @Param
         * @return Return to the status
         """
-        recv = self._dll.BeforeDemuraPowerOn()
+        recv = self._BeforeDemuraPowerOn()
         if recv != 0:
             errcode = self.get_error_code()
             raise DUTError("BeforeDemuraPowerOn  failed.", errcode=errcode)
-        self._logger.debug(f"BeforeDemuraPowerOn success.")
+        self._logger.debug("BeforeDemuraPowerOn success.")
         return True
 
     def demura_write(self):
@@ -369,11 +562,11 @@ class MyzyDDS(object):
         * @Param
         * @return Return to the status
         """
-        recv = self._dll.DemuraWrite()
+        recv = self._DemuraWrite()
         if recv != 0:
             errcode = self.get_error_code()
             raise DUTError("DemuraWrite  failed.", errcode=errcode)
-        self._logger.debug(f"DemuraWrite success.")
+        self._logger.debug("DemuraWrite success.")
         return True
 
     def demura_protection(self, mode):
@@ -382,11 +575,11 @@ class MyzyDDS(object):
         * @Param mode = 0
         * @return Return to the status
         """
-        recv = self._dll.DemuraProtection(mode)
+        recv = self._DemuraProtection(mode)
         if recv != 0:
             errcode = self.get_error_code()
             raise DUTError("DemuraProtection  failed.", errcode=errcode)
-        self._logger.debug(f"DemuraProtection success.")
+        self._logger.debug("DemuraProtection success.")
         return True
 
     def after_demura_poweron(self):
@@ -395,11 +588,11 @@ class MyzyDDS(object):
         * @Param
         * @return Return to the status
         """
-        recv = self._dll.AfterDemuraPowerOn()
+        recv = self._AfterDemuraPowerOn()
         if recv != 0:
             errcode = self.get_error_code()
             raise DUTError("AfterDemuraPowerOn  failed.", errcode=errcode)
-        self._logger.debug(f"AfterDemuraPowerOn success.")
+        self._logger.debug("AfterDemuraPowerOn success.")
         return True
 
     def demura_OTP(self):
@@ -408,19 +601,47 @@ class MyzyDDS(object):
         * @Param
         * @return Return to the status
         """
-        recv = self._dll.DemuraOTP()
+        recv = self._DemuraOTP()
         if recv != 0:
             errcode = self.get_error_code()
             raise DUTError("DemuraOTP  failed.", errcode=errcode)
-        self._logger.debug(f"DemuraOTP success.")
+        self._logger.debug("DemuraOTP success.")
+        return True
+
+    def demura_full_sequence(self, filename, crc, mode):
+        """
+        * @brief run the whole demura write sequence in one DLL call.
+        * Fall back to the step-by-step calls when the DLL has no DemuraFullSequence.
+        * @Param [in] filename; demura bin file
+        * @Param [in] crc; crc16 of the demura data
+        * @Param [in] mode; demura mode 0, 1, 2
+        * @return Return to the status
+        """
+        if self._DemuraFullSequence is None:
+            self.load_demura_file(filename, crc)
+            self.demura_mode(mode)
+            self.before_demura_poweron()
+            self.demura_protection(1)
+            self.demura_write()
+            self.demura_protection(0)
+            self.after_demura_poweron()
+            return True
+        failed_step = c_int(-1)
+        recv = self._DemuraFullSequence(filename.encode('utf-8'), crc, mode, failed_step)
+        if recv != 0:
+            errcode = self.get_error_code()
+            step = failed_step.value
+            step = demura_sequence_steps[step] if 0 <= step < len(demura_sequence_steps) else step
+            raise DUTError(f"DemuraFullSequence  failed at {step}.", errcode=errcode)
+        self._logger.debug("DemuraFullSequence success.")
         return True
 
     def demura_read(self, filename):
-        recv = self._dll.DemuraRead(create_string_buffer(filename.encode('utf-8')))
+        recv = self._DemuraRead(filename.encode('utf-8'))
         if recv != 0:
             errcode = self.get_error_code()
             raise DUTError("DemuraRead  failed.", errcode=errcode)
-        self._logger.debug(f"DemuraRead success.")
+        self._logger.debug("DemuraRead success.")
         return True
     # </editor-fold>
 
@@ -445,9 +666,9 @@ if __name__ == "__main__":
         # the_unit.power_on(0)
         #
         # for image_name in name_list:
-        #     the_unit.show_emmc_image(image_name)
+        #     the_unit.show_emmc_image_by_name(image_name)
         # for image_index in range(len(name_list)):
-        #     the_unit.show_emmc_image(image_index)
+        #     the_unit.show_emmc_image_by_index(image_index)
         #
         # the_unit.set_rgb(255, 255, 0)
         # the_unit.power_off()
@@ -459,18 +680,18 @@ if __name__ == "__main__":
         the_unit.power_off()
 
         # w, h = 2160, 2312
-        # raw_data = np.tile((255, 0, 0), (h, w, 1))
+        # raw_data = np.full((h, w, 3), (255, 0, 0), dtype=np.uint8)
         # cv2.imwrite('b255.bmp', raw_data)
         #
-        # raw_data = np.tile((0, 255, 0), (h, w, 1))
+        # raw_data = np.full((h, w, 3), (0, 255, 0), dtype=np.uint8)
         # cv2.imwrite('g255.bmp', raw_data)
         #
         # the_unit.write_image_to_emmc(['b255.bmp', 'g255.bmp'], False, 1, 0, w, h, 2000 * 2)
         # name_list = the_unit.get_emmc_image_name()
         # for image_name in name_list:
-        #     the_unit.show_emmc_image(image_name)
+        #     the_unit.show_emmc_image_by_name(image_name)
         # for image_index in range(len(name_list)):
-        #     the_unit.show_emmc_image(image_index)
+        #     the_unit.show_emmc_image_by_index(image_index)
 
     except DUTError as e:
         print(f'Fail to run all seq. {e.value} : {e.err_code}')